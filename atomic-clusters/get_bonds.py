@@ -1,5 +1,7 @@
 import argparse
+import sys
 import numpy as np
+from scipy.spatial import cKDTree
 from read_xyz import read_xyz_file
 
 def compute_distances(file_path):
@@ -13,36 +15,31 @@ def compute_distances(file_path):
     """
     atoms, coords = read_xyz_file(file_path)
     
-    # Convert coordinates to numpy array
-    coords = np.array(coords)
-    
-    # Number of atoms
-    num_atoms = len(atoms)
-    
-    # Calculate the distance between two coordinates (atoms)
-    def distance(coord1, coord2):
-        return np.linalg.norm(np.array(coord1) - np.array(coord2))
-    
-    # Create the pairwise distance matrix (links) using manual calculation
-    pairwise_distances = np.array([[distance(coords[i], coords[j]) for j in range(num_atoms) if i != j] for i in range(num_atoms)])
+    coords = np.asarray(coords, dtype=np.float64)
     
     valid_bond = 2.513
+    # Only pairs within valid_bond Å are returned by the k-d tree, so the
+    # distances are computed for the bonded pairs alone instead of all N² pairs
+    pairs = cKDTree(coords).query_pairs(r=valid_bond, output_type='ndarray')
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    ai, aj = pairs[:, 0], pairs[:, 1]
+    distances = np.linalg.norm(coords[ai] - coords[aj], axis=1)
+    
     # Find distances that are less than or equal to valid_bond Å
-    valid_distances = [(i, j, pairwise_distances[i, j - 1]) for i in range(num_atoms) for j in range(i + 1, num_atoms)
-                        if pairwise_distances[i, j - 1] <= valid_bond]
+    mask = distances <= valid_bond
+    ai, aj, valid_distances = ai[mask], aj[mask], distances[mask]
     
     # Print the distances if any valid pairs exist
-    if valid_distances:
-        print("Bond distances in Angstroms (Å):")
-        pair_number = 1
-        for i, j, dist in valid_distances:
-            atom_i = atoms[i]
-            atom_j = atoms[j]
-            print(f"{pair_number}. {atom_i}-{atom_j}: {dist:.6f}")
-            pair_number += 1
+    if len(valid_distances):
+        # Format every bond first and write the whole block at once
+        symbols = np.asarray(atoms)
+        lines = [f"{pair_number}. {atom_i}-{atom_j}: {dist:.6f}"
+                 for pair_number, (atom_i, atom_j, dist)
+                 in enumerate(zip(symbols[ai], symbols[aj], valid_distances), start=1)]
+        sys.stdout.write("Bond distances in Angstroms (Å):\n" + "\n".join(lines) + "\n")
 
         # Compute the average distance of valid pairs
-        average_distance = np.mean([dist for _, _, dist in valid_distances])
+        average_distance = np.mean(valid_distances)
         print(f"\nAverage bond distance: {average_distance:.6f} Å")
     else:
         print("No bond distances below or equal to valid_bond Å were found.")
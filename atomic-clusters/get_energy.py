@@ -20,7 +20,7 @@ def compute_energy(file_path, print_coords=False):
         print("Coordinates:")
         print(coords)
     else:
-        energy = gupta.potential(coords)
+        energy = gupta.potential_fast(coords)
         print(f"Energy: {energy:.6f} eV")
 
 if __name__ == "__main__":
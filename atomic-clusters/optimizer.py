@@ -1,30 +1,41 @@
 # Script to optimize atomic structures from an XYZ file using the Gupta potential
 import argparse
+import numpy as np
 import scipy.optimize as spo
-from autograd import elementwise_grad as egrad
 from potentials.gupta import Gupta
 from read_xyz import read_xyz_file
 from write_xyz import write_xyz_file
 
-def optimize_structure(file_path):
+def optimize_structure(file_path, use_jax=False):
     """Optimize the atomic structure from an XYZ file using the Gupta potential.
     
     Args:
         file_path (str): Path to the input XYZ file.
+        use_jax (bool): If True, use the JIT-compiled JAX implementation of the potential.
     
     Returns:
         None: Saves the optimized structure to a new XYZ file.
     """
     atoms, coords = read_xyz_file(file_path)
     
-    gupta = Gupta(atoms)
-    potential = lambda x: gupta.potential(x.reshape(len(coords), 3))
+    if use_jax:
+        from potentials.gupta_jax import GuptaJAX
+        gupta = GuptaJAX(atoms)
+    else:
+        gupta = Gupta(atoms)
+    
+    # Energy and gradient come from one pass over the pairs (jac=True);
+    # L-BFGS-B works on flat vectors
+    shape = coords.shape
+    def energy_and_gradient(x):
+        energy, gradient = gupta.energy_and_gradient(x.reshape(shape))
+        return float(energy), np.asarray(gradient).ravel()
     
     sol = spo.minimize(
-        potential,
+        energy_and_gradient,
         coords.flatten(),
         method='L-BFGS-B',
-        jac=egrad(potential),
+        jac=True,
         options={
             "gtol": 1e-8,
             "maxiter": 1000,
@@ -43,11 +54,12 @@ if __name__ == "__main__":
     try:
         parser = argparse.ArgumentParser(description="Optimize atomic structure from an XYZ file.")
         parser.add_argument("file", type=str, help="Path to the XYZ file.")
+        parser.add_argument("--jax", action="store_true", help="Use the JIT-compiled JAX implementation of the potential.")
         args = parser.parse_args()
         
         if not args.file:
             raise ValueError("No file path provided. Please specify the path to an XYZ file.")
         
-        optimize_structure(args.file)
+        optimize_structure(args.file, use_jax=args.jax)
     except Exception as e:
         print(f"Error: {e}")
@@ -1,6 +1,20 @@
+from functools import lru_cache
+
+import numpy as onp
 import autograd.numpy as np
-from autograd import elementwise_grad as egrad
 from autograd import hessian as hess
+from autograd.extend import primitive, defvjp
+
+try:
+    from .gupta_numba import gupta_energy, gupta_energy_grad
+except ImportError:
+    # numba is optional; without it the numpy implementation below is used
+    gupta_energy = gupta_energy_grad = None
+
+# Clusters from this many atoms are offloaded to the GPU by potential_fast when
+# numba.cuda is importable and a device is present. Launch and transfer overhead
+# only pay off for large clusters
+CUDA_MIN_ATOMS = 200
 
 
 parameters = {
@@ -17,6 +31,43 @@ parameters = {
 }
 
 
+@lru_cache(maxsize=None)
+def load_gupta_cuda():
+    """Import the CUDA kernels on first use, or return None without numba.cuda.
+
+    gupta_cuda is not imported with the module because numba.cuda takes longer to
+    import than small clusters take to evaluate.
+    """
+    try:
+        from . import gupta_cuda
+    except ImportError:
+        return None
+    return gupta_cuda
+
+
+@primitive
+def segment_sum(values, indices, starts):
+    """Sum values[indices] over the contiguous segments beginning at starts.
+
+    autograd.numpy does not expose np.add.reduceat, so it is wrapped here as a
+    primitive together with its adjoint (segment_scatter).
+    """
+    return onp.add.reduceat(values[indices], starts)
+
+
+@primitive
+def segment_scatter(totals, indices, starts, size):
+    """Adjoint of segment_sum: spread each segment total back onto values."""
+    lengths = onp.diff(onp.append(starts, len(indices)))
+    return onp.bincount(indices, weights=onp.repeat(totals, lengths), minlength=size)
+
+
+defvjp(segment_sum,
+       lambda ans, values, indices, starts: lambda g: segment_scatter(g, indices, starts, len(values)))
+defvjp(segment_scatter,
+       lambda ans, totals, indices, starts, size: lambda g: segment_sum(g, indices, starts))
+
+
 class Gupta:
     '''Python implementation of the Gupta potential for transition metals systems [1].
     
@@ -36,7 +87,9 @@ class Gupta:
             gupta = Gupta(atoms)
         Methods:
             potential = gupta.potential(coord) # Calculate the potential energy (float)
+            potential = gupta.potential_fast(coord) # Same, forward-only compiled evaluation (float)
             gradient = gupta.gradient(coord) # Calculate the gradient vector (np.ndarray)
+            potential, gradient = gupta.energy_and_gradient(coord) # Both in a single pass (float, np.ndarray)
             hessian = gupta.hessian(coord) # Calculate the hessian matrix (np.ndarray)
     '''
 
@@ -44,48 +97,46 @@ class Gupta:
         self.atoms = atoms
         
         n = len(atoms)
-        idx_ij = []
-        atom_ij = []
 
         # https://docs.scipy.org/doc/scipy/reference/spatial.distance.html also
         # uses this ordering
-        for i in range(n - 1):
-            for j in range(i + 1, n):
-                idx_ij.append([i, j])
-                atom_ij.append((atoms[i], atoms[j]))
-        
-        arr_ij = np.array(idx_ij, dtype=int)
-        self.ai = arr_ij[:, 0]
-        self.aj = arr_ij[:, 1]
-
-        # Access parameters using a more readable format with tuples
-        self.A, self.XI, self.P, self.Q, self.R0 = zip(*[
-            parameters[f"{aij[0]}-{aij[1]}"] for aij in atom_ij
-        ])
-
-        # Convert to numpy arrays for calculations
-        self.A = np.array(self.A, dtype=float)
-        self.XI = np.array(self.XI, dtype=float)
-        self.P = np.array(self.P, dtype=float)
-        self.Q = np.array(self.Q, dtype=float)
-        self.R0 = np.array(self.R0, dtype=float)
+        self.ai, self.aj = np.triu_indices(n, 1)
+
+        # Look the parameters up once per distinct element pair and spread them
+        # over all pairs with the same elements
+        elements, kind = np.unique(np.array(atoms), return_inverse=True)
+        pair_kind = kind[self.ai] * len(elements) + kind[self.aj]
+        unique_kinds, pair_param = np.unique(pair_kind, return_inverse=True)
+        table = np.array([
+            parameters[f"{elements[k // len(elements)]}-{elements[k % len(elements)]}"] for k in unique_kinds
+        ], dtype=float).reshape(-1, 5)
+
+        # Per-pair parameter arrays for calculations
+        self.A, self.XI, self.P, self.Q, self.R0 = np.ascontiguousarray(table[pair_param].T)
 
         # Calculate these once instead of every time in potential
         self.XI2 = self.XI**2
         self.nP = -self.P
         self.nQ2 = -self.Q * 2
 
-        # Ensure i < j for correct position in the upper triangular matrix
-        def idx(i, j):
-            if j < i:
-                i, j = j, i
-            return n * i + j - ((i + 2) * (i + 1)) // 2
-        
-        # Create a pairwise interaction matrix
-        self.pairwise = np.array([[idx(i, j) for j in range(n) if i != j] for i in range(n)])
+        # CSR neighbour list: the pair indices of atom i are
+        # indices[indptr[i]:indptr[i + 1]]. Row i lists j = 0..n-1 skipping i,
+        # and (i, j) is stored at n*i + j - (i+2)(i+1)/2 with i < j
+        i = np.repeat(np.arange(n), n - 1)
+        j = np.tile(np.arange(n - 1), n)
+        j = j + (j >= i)
+        lo, hi = np.minimum(i, j), np.maximum(i, j)
+        self.indices = n * lo + hi - ((lo + 2) * (lo + 1)) // 2
+        self.indptr = np.arange(n + 1) * (n - 1)
+
+        # Device copies of the pair arrays, uploaded on the first GPU evaluation
+        self._cuda_args = None
 
-        # Precompute the gradient and hessian functions of the potential
-        self.gradient = egrad(self.potential)
+        # Build the hessian (n, 3, n, 3) callable once; this instance attribute
+        # is the public gupta.hessian. autograd's hessian records the gradient
+        # tape once and then runs 3n reverse sweeps over it, which is cheaper
+        # here than differentiating the analytic gradient (GuptaJAX uses
+        # jax.hessian, i.e. forward-over-reverse)
         self.hessian = hess(self.potential)
 
 
@@ -105,18 +156,49 @@ class Gupta:
                 Phys. Rev. B 23, 6265 - Published 15 June 1981
                 https://doi.org/10.1103/PhysRevB.23.6265
         """
-        dist = np.linalg.norm(coords[self.ai] - coords[self.aj], axis=1)
+        # Gather each coordinate column separately (structure of arrays)
+        x, y, z = coords[:, 0], coords[:, 1], coords[:, 2]
+        dx = x[self.ai] - x[self.aj]
+        dy = y[self.ai] - y[self.aj]
+        dz = z[self.ai] - z[self.aj]
+        dist = np.sqrt(dx * dx + dy * dy + dz * dz)
         norm = dist / self.R0 - 1.0
         Ub = self.XI2 * np.exp(self.nQ2 * norm)
         Ur = self.A * np.exp(self.nP * norm)
         U: float = 2.0 * np.sum(Ur)
-        U -= np.sum(np.sqrt(np.sum(Ub[self.pairwise], axis=1)))
+        U -= np.sum(np.sqrt(segment_sum(Ub, self.indices, self.indptr[:-1])))
         return U
     
 
+    def potential_fast(self, coords: np.ndarray) -> float:
+        """
+        Calculate the potential energy for pure forward evaluation.
+
+        Clusters with at least CUDA_MIN_ATOMS atoms are evaluated on the GPU
+        when a CUDA device is available. Otherwise uses the compiled numba kernel
+        when numba is installed and falls back to potential. Unlike potential, it
+        cannot be differentiated by autograd.
+
+        Args:
+            coords: A matrix with shape (n, 3) (np.ndarray).
+
+        Returns:
+            The calculated potential energy (float).
+        """
+        if len(self.atoms) >= CUDA_MIN_ATOMS:
+            gupta_cuda = load_gupta_cuda()
+            if gupta_cuda is not None and gupta_cuda.is_available():
+                if self._cuda_args is None:
+                    self._cuda_args = gupta_cuda.to_device(self.ai, self.aj, *self._kernel_args())
+                return gupta_cuda.gupta_energy_cuda(onp.asarray(coords, dtype=float), *self._cuda_args)
+        if gupta_energy is not None:
+            return gupta_energy(onp.asarray(coords, dtype=float), *self._kernel_args())
+        return self.potential(coords)
+    
+
     def gradient(self, coords: np.ndarray) -> np.ndarray:
         """
-        Compute the gradient of the potential with respect to atomic coordinates.
+        Compute the analytic gradient of the potential with respect to atomic coordinates.
 
         Args:
             coords: A matrix with shape (n, 3) (np.ndarray).
@@ -124,17 +206,52 @@ class Gupta:
         Returns:
             The gradient matrix of the potential with shape (n, 3) (np.ndarray).
         """
-        return egrad(self.potential)(coords)
-
+        return self.energy_and_gradient(coords)[1]
+    
 
-    def hessian(self, coords: np.ndarray) -> np.ndarray:
+    def energy_and_gradient(self, coords: np.ndarray) -> tuple[float, np.ndarray]:
         """
-        Calculate the Hessian matrix of the potential at the given coordinates.
+        Compute the potential energy and its analytic gradient in a single pass.
+
+        With rho_i the sum of Ub over the pairs containing atom i, each pair (i, j)
+        contributes dU/dr_ij = 2 dUr/dr - (1 / (2 sqrt(rho_i)) + 1 / (2 sqrt(rho_j))) dUb/dr
+        along the unit vector (r_i - r_j) / r_ij.
 
         Args:
-            coords: A matrix with shape (3n, 3n) (np.ndarray).
+            coords: A matrix with shape (n, 3) (np.ndarray).
 
         Returns:
-            The Hessian matrix of the potential with shape (3n, 3n) (np.ndarray).
+            A tuple with the potential energy (float) and the gradient matrix
+            with shape (n, 3) (np.ndarray).
         """
-        return hess(self.potential)(coords)
+        if gupta_energy_grad is not None:
+            return gupta_energy_grad(onp.asarray(coords, dtype=float), *self._kernel_args())
+
+        x, y, z = coords[:, 0], coords[:, 1], coords[:, 2]
+        dx = x[self.ai] - x[self.aj]
+        dy = y[self.ai] - y[self.aj]
+        dz = z[self.ai] - z[self.aj]
+        dist = np.sqrt(dx * dx + dy * dy + dz * dz)
+        norm = dist / self.R0 - 1.0
+        Ub = self.XI2 * np.exp(self.nQ2 * norm)
+        Ur = self.A * np.exp(self.nP * norm)
+        dUb_dr = self.nQ2 / self.R0 * Ub
+        dUr_dr = self.nP / self.R0 * Ur
+
+        sqrt_rho = np.sqrt(segment_sum(Ub, self.indices, self.indptr[:-1]))
+        U: float = 2.0 * np.sum(Ur) - np.sum(sqrt_rho)
+
+        inv_sqrt_rho = 0.5 / sqrt_rho
+        dU_dr = 2.0 * dUr_dr - (inv_sqrt_rho[self.ai] + inv_sqrt_rho[self.aj]) * dUb_dr
+
+        f = dU_dr / dist
+        grad = onp.zeros((len(coords), 3))
+        for k, d in enumerate((dx, dy, dz)):
+            onp.add.at(grad[:, k], self.ai, f * d)
+            onp.add.at(grad[:, k], self.aj, -f * d)
+        return U, grad
+    
+
+    def _kernel_args(self) -> tuple[np.ndarray, ...]:
+        """Per-pair parameters in the order the numba kernels expect."""
+        return self.A, self.XI2, self.nP, self.nQ2, self.R0
@@ -0,0 +1,99 @@
+import math
+import numpy as np
+from numba import cuda, float64
+
+# CUDA kernels for the Gupta potential. One thread evaluates one (i, j) pair of
+# the condensed ordering and scatters its Ub into rho with atomic adds; a second
+# kernel takes one thread per atom for the sqrt(rho_i) term. Each block sums the
+# energy terms of its threads in shared memory and adds the block total to the
+# energy with a single atomic, so only a single float is copied back. Launch and
+# transfer overhead only pay off for large clusters, see gupta.CUDA_MIN_ATOMS.
+# Atomic adds on float64 need a device of compute capability 6.0 or newer.
+THREADS_PER_BLOCK = 128  # A power of two, halved at every step of block_sum
+MIN_COMPUTE_CAPABILITY = (6, 0)
+
+
+@cuda.jit(device=True)
+def block_sum(partial):
+    """Tree reduction of the THREADS_PER_BLOCK values in shared memory; the total ends up in partial[0]."""
+    t = cuda.threadIdx.x
+    stride = THREADS_PER_BLOCK // 2
+    while stride > 0:
+        cuda.syncthreads()
+        if t < stride:
+            partial[t] += partial[t + stride]
+        stride //= 2
+    cuda.syncthreads()
+
+
+@cuda.jit
+def gupta_kernel(x, y, z, ai, aj, A, XI2, nP, nQ2, R0, rho, energy):
+    partial = cuda.shared.array(THREADS_PER_BLOCK, float64)
+    p = cuda.grid(1)
+    partial[cuda.threadIdx.x] = 0.0
+    if p < ai.shape[0]:
+        i = ai[p]
+        j = aj[p]
+        dx = x[i] - x[j]
+        dy = y[i] - y[j]
+        dz = z[i] - z[j]
+        norm = math.sqrt(dx * dx + dy * dy + dz * dz) / R0[p] - 1.0
+        Ub = XI2[p] * math.exp(nQ2[p] * norm)
+        cuda.atomic.add(rho, i, Ub)
+        cuda.atomic.add(rho, j, Ub)
+        partial[cuda.threadIdx.x] = 2.0 * A[p] * math.exp(nP[p] * norm)
+    block_sum(partial)
+    if cuda.threadIdx.x == 0:
+        cuda.atomic.add(energy, 0, partial[0])
+
+
+@cuda.jit
+def density_kernel(rho, energy):
+    partial = cuda.shared.array(THREADS_PER_BLOCK, float64)
+    i = cuda.grid(1)
+    partial[cuda.threadIdx.x] = 0.0
+    if i < rho.shape[0]:
+        partial[cuda.threadIdx.x] = -math.sqrt(rho[i])
+    block_sum(partial)
+    if cuda.threadIdx.x == 0:
+        cuda.atomic.add(energy, 0, partial[0])
+
+
+def is_available() -> bool:
+    """Whether a CUDA device with float64 atomic adds (compute capability 6.0+) is present."""
+    if not cuda.is_available():
+        return False
+    return tuple(cuda.get_current_device().compute_capability) >= MIN_COMPUTE_CAPABILITY
+
+
+def to_device(*arrays: np.ndarray) -> tuple:
+    """Copy the per-pair arrays to the device once so they can be reused across calls."""
+    return tuple(cuda.to_device(np.ascontiguousarray(a)) for a in arrays)
+
+
+def gupta_energy_cuda(coords, ai, aj, A, XI2, nP, nQ2, R0) -> float:
+    """
+    Compute the Gupta potential energy on the GPU.
+
+    Args:
+        coords: A matrix with shape (n, 3) (np.ndarray).
+        ai, aj: Atom indices of every pair in the condensed (i < j) ordering
+            (device arrays, see to_device).
+        A, XI2, nP, nQ2, R0: Per-pair parameters as stored on Gupta (device arrays).
+
+    Returns:
+        The potential energy (float).
+    """
+    n = coords.shape[0]
+    x, y, z = (cuda.to_device(c) for c in np.ascontiguousarray(coords.T))
+    rho = cuda.device_array(n)
+    energy = cuda.device_array(1)
+    rho[:] = 0.0
+    energy[:] = 0.0
+
+    npairs = ai.shape[0]
+    blocks = (npairs + THREADS_PER_BLOCK - 1) // THREADS_PER_BLOCK
+    gupta_kernel[blocks, THREADS_PER_BLOCK](x, y, z, ai, aj, A, XI2, nP, nQ2, R0, rho, energy)
+    blocks = (n + THREADS_PER_BLOCK - 1) // THREADS_PER_BLOCK
+    density_kernel[blocks, THREADS_PER_BLOCK](rho, energy)
+    return float(energy.copy_to_host()[0])
@@ -0,0 +1,54 @@
+import jax
+import jax.numpy as jnp
+from .gupta import Gupta
+
+# L-BFGS-B needs double precision energies and gradients
+jax.config.update("jax_enable_x64", True)
+
+
+class GuptaJAX(Gupta):
+    '''JAX implementation of the Gupta potential.
+
+    Same interface as Gupta, but potential, gradient and hessian are compiled
+    with jax.jit on their first call and the compiled XLA kernels are reused
+    on every call after that.
+
+    Example:
+        gupta = GuptaJAX(["Fe", "Co", "Ni"])
+        potential = gupta.potential(coord) # Potential energy (jax.Array, scalar)
+        gradient = gupta.gradient(coord) # Gradient with shape (n, 3) (jax.Array)
+        potential, gradient = gupta.energy_and_gradient(coord) # Both in a single pass (jax.Array)
+        hessian = gupta.hessian(coord) # Hessian with shape (n, 3, n, 3) (jax.Array)
+    '''
+
+    def __init__(self, atoms: list[str]) -> None:
+        super().__init__(atoms)
+
+        self.potential = jax.jit(self._potential)
+        self.potential_fast = self.potential
+        self.gradient = jax.jit(jax.grad(self._potential))
+        self.energy_and_gradient = jax.jit(jax.value_and_grad(self._potential))
+        self.hessian = jax.jit(jax.hessian(self._potential))
+
+
+    def _potential(self, coords: jnp.ndarray) -> jnp.ndarray:
+        """
+        Calculate the potential energy of the system (traceable by JAX).
+
+        Args:
+            coords: A matrix with shape (n, 3) (jnp.ndarray).
+
+        Returns:
+            The calculated potential energy (jnp.ndarray, scalar).
+        """
+        n = len(self.indptr) - 1
+        x, y, z = coords[:, 0], coords[:, 1], coords[:, 2]
+        dx = x[self.ai] - x[self.aj]
+        dy = y[self.ai] - y[self.aj]
+        dz = z[self.ai] - z[self.aj]
+        dist = jnp.sqrt(dx * dx + dy * dy + dz * dz)
+        norm = dist / self.R0 - 1.0
+        Ub = self.XI2 * jnp.exp(self.nQ2 * norm)
+        Ur = self.A * jnp.exp(self.nP * norm)
+        rho = jnp.sum(Ub[self.indices].reshape(n, n - 1), axis=1)
+        return 2.0 * jnp.sum(Ur) - jnp.sum(jnp.sqrt(rho))
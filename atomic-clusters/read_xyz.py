@@ -10,14 +10,13 @@ def read_xyz_file(path: str) -> tuple[list[str], np.ndarray]:
     Returns:
         A tuple containing the coordinates (np.ndarray) and atom types (list[str]).
     """
-    atoms = []
-    coordinates = []
+    # The first line holds the number of atoms, which bounds the rows read so that trailing
+    # blank lines or extra frames are ignored
     with open(path, "r") as file:
-        for i, line in enumerate(file):
-            if i < 2:
-                continue
-            atom, *xyz = line.split()
-            atoms.append(atom)
-            coordinates.append(xyz)
+        n_atoms = int(file.readline())
+
+    # Parse the atom labels and the coordinate columns with numpy's C reader
+    atoms = np.loadtxt(path, skiprows=2, max_rows=n_atoms, usecols=(0,), dtype=str, ndmin=1).tolist()
+    coordinates = np.loadtxt(path, skiprows=2, max_rows=n_atoms, usecols=(1, 2, 3), dtype=np.float64, ndmin=2)
     
-    return atoms, np.array(coordinates, dtype=float)
+    return atoms, coordinates
@@ -0,0 +1,61 @@
+"""
+This script checks the analytic gradient of the Gupta potential against autograd. It builds a
+random mixed Fe/Co/Ni cluster and compares the energy and gradient returned by
+`Gupta.energy_and_gradient` with `Gupta.potential` and `autograd.grad(Gupta.potential)`, once with
+the compiled numba kernel (when numba is installed) and once with the numpy implementation.
+
+Modules:
+    potentials.gupta: Contains the `Gupta` class and the optional numba kernel `gupta_energy_grad`.
+
+Functions:
+    random_cluster: Builds a random mixed Fe/Co/Ni cluster.
+    check_energy_and_gradient: Compares energy_and_gradient with the autograd result.
+
+Usage:
+    Run the script from the atomic-clusters directory:
+        python test_gupta.py
+"""
+
+import sys
+import numpy as np
+from autograd import grad
+from potentials import gupta as gupta_module
+from potentials.gupta import Gupta
+
+def random_cluster(n, seed=0):
+    """Random Fe/Co/Ni cluster of n atoms on a jittered grid, so all distances are physical."""
+    rng = np.random.default_rng(seed)
+    # The parameters are listed as Fe-Co, Fe-Ni and Co-Ni, so the atoms are kept in that order
+    atoms = sorted(rng.choice(["Fe", "Co", "Ni"], n), key=["Fe", "Co", "Ni"].index)
+    side = int(np.ceil(n ** (1 / 3)))
+    grid = np.array([[i, j, k] for i in range(side) for j in range(side) for k in range(side)], dtype=float)
+    coords = grid[:n] * 2.4 + rng.normal(scale=0.1, size=(n, 3))
+    return atoms, coords
+
+def check_energy_and_gradient(gupta, coords):
+    """Returns whether energy_and_gradient agrees with potential and its autograd gradient."""
+    energy, gradient = gupta.energy_and_gradient(coords)
+    expected_energy = gupta.potential(coords)
+    expected_gradient = grad(gupta.potential)(coords)
+    return np.isclose(energy, expected_energy, rtol=1e-12) and np.allclose(gradient, expected_gradient, rtol=1e-9, atol=1e-10)
+
+atoms, coords = random_cluster(38)
+gupta = Gupta(atoms)
+passed = True
+
+if gupta_module.gupta_energy_grad is not None:
+    ok = check_energy_and_gradient(gupta, coords)
+    print(f"numba energy_and_gradient: {'OK' if ok else 'FAILED'}")
+    passed = passed and ok
+else:
+    print("numba energy_and_gradient: skipped, numba is not installed")
+
+# Force the numpy implementation
+numba_kernel = gupta_module.gupta_energy_grad
+gupta_module.gupta_energy_grad = None
+ok = check_energy_and_gradient(gupta, coords)
+gupta_module.gupta_energy_grad = numba_kernel
+print(f"numpy energy_and_gradient: {'OK' if ok else 'FAILED'}")
+passed = passed and ok
+
+sys.exit(0 if passed else 1)
@@ -6,13 +6,15 @@ It also generates XYZ files containing atomic coordinates and appends the extrac
 
 Functions:
 - main(): Parses command-line arguments, processes the ORCA output file, and saves results to a CSV file.
-- get_energy(content: str) -> float: Extracts the final single point energy value from the ORCA output file content.
-- get_magnetic(content: str) -> float: Extracts the magnetic spin population value from the ORCA output file content.
-- get_frequencies(content: str) -> int: Counts the number of imaginary vibrational modes in the ORCA output file content.
-- get_gap(content: str) -> tuple[float, float, float]: Extracts HOMO, LUMO, and HOMO-LUMO gap from the ORCA output file content.
-- write_xyz(content: str) -> None: Extracts Cartesian coordinates from the ORCA output file and writes them to a new .xyz file.
+- find_markers(content: mmap.mmap) -> dict[bytes, int]: Locates the last occurrence of every marker (the first for header markers) in the memory-mapped ORCA output file.
+- read_lines(content: mmap.mmap, idx: int, after: int) -> list[str]: Decodes the lines starting at a byte offset.
+- get_energy(content, markers) -> float: Extracts the final single point energy value from the ORCA output file content.
+- get_magnetic(content, markers) -> float: Extracts the magnetic spin population value from the ORCA output file content.
+- get_frequencies(content, markers) -> int: Counts the number of imaginary vibrational modes in the ORCA output file content.
+- get_gap(content, markers) -> tuple[float, float, float]: Extracts HOMO, LUMO, and HOMO-LUMO gap from the ORCA output file content.
+- write_xyz(content, markers, xyz_path) -> None: Extracts Cartesian coordinates from the ORCA output file and writes them to a new .xyz file.
 - read_xyz(path: str) -> tuple[list[str], np.ndarray]: Reads an XYZ file and returns atom types and coordinates.
-- get_distances() -> float: Calculates the average interatomic distance for valid bonds in the XYZ file.
+- get_distances(xyz_path: str) -> float: Calculates the average interatomic distance for valid bonds in the XYZ file.
 
 Usage:
 Run the script from the command line, providing the path to an ORCA output file as an argument:
@@ -20,9 +22,26 @@ Run the script from the command line, providing the path to an ORCA output file
 '''
 
 import argparse
+import csv
+import mmap
 import os
 import numpy as np
-import pandas as pd
+from scipy.spatial.distance import pdist
+
+# Markers whose last occurrence is located by find_markers, except for HEADER_MARKERS
+MARKERS = (
+    b"FINAL SINGLE POINT ENERGY",
+    b"Sum of atomic spin populations",
+    b"VIBRATIONAL FREQUENCIES",
+    b"SPIN DOWN ORBITALS",
+    b"CARTESIAN COORDINATES (ANGSTROEM)",
+    b"Number of atoms",
+)
+# Header markers, located by their first occurrence instead. slurm/get_coords.py reads the
+# number of atoms with grep -m1, so both tools take the same line
+HEADER_MARKERS = (b"Number of atoms",)
+# Marker counted within the frequencies section instead of located
+IMAGINARY_MODE = b"***imaginary mode***"
 
 
 def main():
@@ -34,219 +53,233 @@ def main():
 
     # Get the file path from the parsed arguments
     file = args.file
-    # Open the specified ORCA output file and read its content
-    with open(file, "r") as f:
-        content = f.read().strip()
-    
-    # Extract Cartesian coordinates and write them to a new .xyz file
-    write_xyz(content)
-    
-    # Extract data
-    energy = get_energy(content)
-    magnetic_moment = get_magnetic(content)
-    frequencies = get_frequencies(content)
-    homo, lumo, gap = get_gap(content)
-    avg_distance = get_distances()
-
-    # Create a DataFrame
-    data = {
-        "filename": [os.path.basename(file)],
-        "energy": [energy],
-        "mag moment": [magnetic_moment],
-        "freq": [frequencies],
-        "homo": [homo],
-        "lumo": [lumo],
-        "gap": [gap],
-        "avg dist": [avg_distance],
-    }
-    df = pd.DataFrame(data)
-
-    # Save to CSV
+    # The coordinates are written next to the ORCA output file
+    xyz_path = os.path.splitext(file)[0] + ".xyz"
+    # Map the specified ORCA output file instead of reading it, so only the
+    # pages around the markers are loaded
+    with open(file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        markers = find_markers(content)
+        
+        # Extract Cartesian coordinates and write them to a new .xyz file
+        write_xyz(content, markers, xyz_path)
+        
+        # Extract data
+        energy = get_energy(content, markers)
+        magnetic_moment = get_magnetic(content, markers)
+        frequencies = get_frequencies(content, markers)
+        homo, lumo, gap = get_gap(content, markers)
+    avg_distance = get_distances(xyz_path)
+
+    # Append a single row to the CSV, writing the header for a new file
     output_csv = "results.csv"
-    if not os.path.exists(output_csv):
-        df.to_csv(output_csv, index=False)
-    else:
-        df.to_csv(output_csv, mode='a', header=False, index=False)
+    header = ["filename", "energy", "mag moment", "freq", "homo", "lumo", "gap", "avg dist"]
+    row = [os.path.basename(file), energy, magnetic_moment, frequencies, homo, lumo, gap, avg_distance]
+    new_file = not os.path.exists(output_csv)
+    with open(output_csv, "a", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        if new_file:
+            writer.writerow(header)
+        writer.writerow(row)
+
+def find_markers(content: mmap.mmap) -> dict[bytes, int]:
+    """
+    Locates the last occurrence of every marker in the given content, or the
+    first one for the markers in HEADER_MARKERS.
+
+    Each marker is found with mmap.rfind or mmap.find, which search the mapped
+    file without copying it into a Python string.
+
+    Args:
+        content (mmap.mmap): The memory-mapped ORCA output file.
+    Returns:
+        dict[bytes, int]: The byte offset of the located occurrence of each marker in
+            MARKERS that was found, plus the number of occurrences of IMAGINARY_MODE
+            after "VIBRATIONAL FREQUENCIES" when that section exists.
+    """
+
+    markers = {}
+    for word in MARKERS:
+        idx = content.find(word) if word in HEADER_MARKERS else content.rfind(word)
+        if idx < 0:
+            continue
+        markers[word] = idx
+        if word == b"VIBRATIONAL FREQUENCIES":
+            # Imaginary modes are only listed after the last frequencies header
+            markers[IMAGINARY_MODE] = content[idx:].count(IMAGINARY_MODE)
+    return markers
+
+def read_lines(content: mmap.mmap, idx: int, after: int = 0) -> list[str]:
+    """
+    Decodes the line containing the byte offset idx and the lines that follow it.
+
+    Args:
+        content (mmap.mmap): The memory-mapped ORCA output file.
+        idx (int): A byte offset inside the line of interest.
+        after (int): Number of lines to include after that line.
+    Returns:
+        list[str]: The decoded lines, starting with the line containing idx.
+    """
+
+    start = content.rfind(b"\n", 0, idx)
+    end = idx
+    for _ in range(after + 1):
+        end = content.find(b"\n", end + 1)
+        if end < 0:
+            end = len(content)
+            break
+    return content[start + 1:end].decode().splitlines()
 
-def get_energy(content: str) -> float:
+def get_energy(content: mmap.mmap, markers: dict[bytes, int]) -> float:
     """
     Extracts the final single point energy value from the given content.
 
-    This function searches for the phrase "FINAL SINGLE POINT ENERGY" in the 
-    provided content string. If found, it retrieves the energy value from the 
-    corresponding line. The energy value is expected to be the last element 
-    on the line containing the phrase.
+    This function looks up the last line containing the phrase "FINAL SINGLE 
+    POINT ENERGY". If found, it retrieves the energy value from that line. 
+    The energy value is expected to be the last element on the line.
 
     Args:
-        content (str): The content of a file or string to search for the energy value,
-        typically from an ORCA output file.
+        content (mmap.mmap): The memory-mapped file to search for the energy value,
+        typically an ORCA output file.
+        markers (dict[bytes, int]): Marker offsets from find_markers.
     Returns:
         float: The extracted energy value if the phrase is found, otherwise None.
     """
 
-    word = "FINAL SINGLE POINT ENERGY"
+    idx = markers.get(b"FINAL SINGLE POINT ENERGY")
 
-    if word in content:
-        lines = content.splitlines()
-        for i in range(len(lines) -1, -1, -1):
-            if word in lines[i]:
-                energy = lines[i].split()[-1]
-                return energy
-    else:
+    if idx is None:
         return None
+    energy = read_lines(content, idx)[0].split()[-1]
+    return energy
 
-def get_magnetic(content: str) -> float:
+def get_magnetic(content: mmap.mmap, markers: dict[bytes, int]) -> float:
     """
     Extracts the magnetic spin population value from the given content.
     
-    This function searches for the phrase "Sum of atomic spin populations" 
-    in the provided content string. If found, it retrieves the last value 
-    on the corresponding line, which represents the spin population.
+    This function looks up the last line containing the phrase "Sum of atomic 
+    spin populations". If found, it retrieves the last value on that line, 
+    which represents the spin population.
     
     Args:
-        content (str): The content string to search for the spin population,
-        typically from an ORCA output file.
+        content (mmap.mmap): The memory-mapped file to search for the spin population,
+        typically an ORCA output file.
+        markers (dict[bytes, int]): Marker offsets from find_markers.
     Returns:
         float: The extracted spin population value if the phrase is found, 
                otherwise None.
     """
      
-    word = "Sum of atomic spin populations"
-
-    if word in content:
-        lines = content.splitlines()
-        for i in range(len(lines) -1, -1, -1):
-            if word in lines[i]:
-                spin_popluation = lines[i].split()[-1]
-                return spin_popluation
-    else:
+    idx = markers.get(b"Sum of atomic spin populations")
+
+    if idx is None:
         return None
+    spin_popluation = read_lines(content, idx)[0].split()[-1]
+    return spin_popluation
      
-def get_frequencies(content: str) -> int:
+def get_frequencies(content: mmap.mmap, markers: dict[bytes, int]) -> int:
     """
     Analyzes the provided content to determine the number of imaginary vibrational modes.
 
-    This function searches for the presence of the phrase "VIBRATIONAL FREQUENCIES" 
-    in the given content. If found, it counts the occurrences of the phrase 
-    "***imaginary mode***" to determine the number of imaginary vibrational modes.
+    This function checks for the presence of the phrase "VIBRATIONAL FREQUENCIES". 
+    If found, it returns the number of "***imaginary mode***" occurrences after 
+    the last frequencies header, counted by find_markers, as the number of 
+    imaginary vibrational modes.
 
     Args:
-        content (str): The text content to analyze, typically from an ORCA output file.
+        content (mmap.mmap): The memory-mapped file to analyze, typically an ORCA output file.
+        markers (dict[bytes, int]): Marker offsets from find_markers.
     Returns:
         int: The number of imaginary vibrational modes if "VIBRATIONAL FREQUENCIES" 
              is found in the content; otherwise, None.
     """
 
-    word = "VIBRATIONAL FREQUENCIES"
-
-    if word in content:
-        lines = content.splitlines()
-        for i in range(len(lines) -1, -1, -1):
-            if word in lines[i]:
-                imaginary_counts = content.count("***imaginary mode***")
-                return imaginary_counts
-    else:
-        return None
+    imaginary_counts = markers.get(IMAGINARY_MODE)
+    return imaginary_counts
     
-def get_gap(content: str) -> tuple[float, float, float]:
+def get_gap(content: mmap.mmap, markers: dict[bytes, int]) -> tuple[float, float, float]:
     """
     Extracts the HOMO (Highest Occupied Molecular Orbital) energy, 
     LUMO (Lowest Unoccupied Molecular Orbital) energy, and the 
     HOMO-LUMO gap from the given content.
     
-    The function searches for the "SPIN DOWN ORBITALS" section in the 
+    The function looks up the last "SPIN DOWN ORBITALS" section in the 
     provided content, identifies the number of orbitals, and calculates 
     the HOMO and LUMO energies. The HOMO-LUMO gap is computed as the 
     absolute difference between the HOMO and LUMO energies.
     
     Args:
-        content (str): The input string containing the molecular orbital 
-                       data, typically from an ORCA output file.
+        content (mmap.mmap): The memory-mapped file containing the molecular 
+                             orbital data, typically an ORCA output file.
+        markers (dict[bytes, int]): Marker offsets from find_markers.
     Returns:
         tuple[float, float, float]: A tuple containing:
             - HOMO (float): The energy of the highest occupied molecular orbital.
             - LUMO (float): The energy of the lowest unoccupied molecular orbital.
             - gap (float): The HOMO-LUMO gap.
-    Raises:
-        ValueError: If the required data is not found in the content or 
-                    if the parsing fails.
+            All three are None if the section or the orbitals are not found.
     """
 
-    word = "SPIN DOWN ORBITALS"
-
-    if word in content:
-        lines = content.splitlines()
-        for i in range(len(lines) -1, -1, -1):
-            if word in lines[i]:
-                for line in reversed(lines):
-                    if "SPIN DOWN ORBITALS" in line:
-                        found_section = True
-                        i = lines.index(line)
-                        continue
-                
-                # Get the number of orbitals from the line two lines above the "SPIN DOWN ORBITALS" section
-                n_orb = int(lines[i-2].split()[0])
-
-                if found_section:
-                    # Iterate over the orbitals to find the HOMO and LUMO
-                    for j in range(n_orb):
-                        parts = lines[i-j].split()
-                        # Check if the line corresponds to an occupied orbital (HOMO)
-                        if len(parts) == 4 and parts[1] == "1.0000":
-                            homo = float(parts[3])
-                            lumo_parts = lines[i-j+1].split()
-                            # Get the energy of the next orbital (LUMO)
-                            lumo = float(lumo_parts[3])
-                            break
-                
-                # Write the HOMO, LUMO, and HOMO-LUMO gap to the log file
+    homo = lumo = gap = None
+    idx = markers.get(b"SPIN DOWN ORBITALS")
+
+    if idx is not None:
+        # Decode only the spin up orbitals that precede the "SPIN DOWN ORBITALS" section
+        start = max(content.rfind(b"SPIN UP ORBITALS", 0, idx), 0)
+        lines = read_lines(content, start, after=content[start:idx].count(b"\n"))
+        i = len(lines) - 1
+
+        # Get the number of orbitals from the line two lines above the "SPIN DOWN ORBITALS" section
+        n_orb = int(lines[i-2].split()[0])
+
+        # Iterate over the orbitals to find the HOMO and LUMO
+        for j in range(n_orb):
+            parts = lines[i-j].split()
+            # Check if the line corresponds to an occupied orbital (HOMO)
+            if len(parts) == 4 and parts[1] == "1.0000":
+                homo = float(parts[3])
+                lumo_parts = lines[i-j+1].split()
+                # Get the energy of the next orbital (LUMO)
+                lumo = float(lumo_parts[3])
+                # HOMO-LUMO gap
                 gap = abs(homo) - lumo
-                if homo is not None and lumo is not None:
-                    return homo, lumo, gap
-                else:
-                    None
+                break
+
+    return homo, lumo, gap
 
-def write_xyz(content: str) -> None:
+def write_xyz(content: mmap.mmap, markers: dict[bytes, int], xyz_path: str) -> None:
     """
     Extracts Cartesian coordinates from the content of a file and writes them to a new .xyz file.
     
-    This function searches for a specific keyword ("CARTESIAN COORDINATES (ANGSTROEM)") 
-    in the content of a file, extracts the corresponding atomic coordinates, and writes 
-    them to a new .xyz file. The number of atoms is assumed to be n. Additionally, the 
-    energy value is retrieved using the `get_energy` function and included in the .xyz file.
+    This function looks up the last line with the keyword ("CARTESIAN COORDINATES (ANGSTROEM)"), 
+    extracts the corresponding atomic coordinates, and writes them to a new .xyz file. 
+    The number of atoms n is parsed from the first "Number of atoms" line, in the ORCA header. Additionally, the energy value is retrieved 
+    using the `get_energy` function and included in the .xyz file.
     
     Args:
-        content (str): The content of the file as a string, typically from an ORCA output file.
+        content (mmap.mmap): The memory-mapped file, typically an ORCA output file.
+        markers (dict[bytes, int]): Marker offsets from find_markers.
+        xyz_path (str): Path of the .xyz file to write.
     Returns:
         None: The function writes the output to a file and does not return any value.
     Notes:
-        - The function assumes that the input directory contains files with a ".out" extension.
-        - The `get_energy` function must be defined elsewhere in the codebase.
-        - If the keyword is not found in the content, the function prints a message and exits.
+        - If either keyword is not found in the content, the function prints a message and exits.
     """
 
-    dir = os.getcwd()
-    n = 38
-    for file in os.listdir(dir):
-        if file.endswith(".out"):
-            file_path = os.path.join(dir, file)
+    for word in (b"Number of atoms", b"CARTESIAN COORDINATES (ANGSTROEM)"):
+        if word not in markers:
+            print(f"String '{word.decode()}' not found in the file.")
+            return
+
+    # Number of atoms, the last value on its header line
+    n = int(read_lines(content, markers[b"Number of atoms"])[0].split()[-1])
     
-    # Search for the target string from the end of the file
-    word = "CARTESIAN COORDINATES (ANGSTROEM)"
-    lines = content.splitlines()
-    for i in range(len(lines) - 1, -1, -1):
-        if word in lines[i]:
-            coordinates = lines[i+2:i+2+n]
-            break
-    else:
-        print(f"String '{word}' not found in the file.")
-        return
+    idx = markers[b"CARTESIAN COORDINATES (ANGSTROEM)"]
+    coordinates = read_lines(content, idx, after=n+1)[2:]
 
     # Write the coordinates to a new .xyz file
-    xyz_file_path = file_path.replace('.out', '.xyz')
-    with open(xyz_file_path, 'w') as xyz_file:
+    with open(xyz_path, 'w') as xyz_file:
         xyz_file.write(f"{n}\n")
-        energy = get_energy(content)
+        energy = get_energy(content, markers)
         xyz_file.write(f"{energy}\n")
         xyz_file.write('\n'.join(coordinates))
 
@@ -259,53 +292,40 @@ def read_xyz(path: str) -> tuple[list[str], np.ndarray]:
     Returns:
         A tuple containing the coordinates (np.ndarray) and atom types (list[str]).
     """
-    atoms = []
-    coordinates = []
+    # The first line holds the number of atoms, which bounds the rows read so that trailing
+    # blank lines are ignored
     with open(path, "r") as file:
-        for i, line in enumerate(file):
-            if i < 2:
-                continue
-            atom, *xyz = line.split()
-            atoms.append(atom)
-            coordinates.append(xyz)
+        n_atoms = int(file.readline())
+
+    # Parse the atom labels and the coordinate columns with numpy's C reader
+    atoms = np.loadtxt(path, skiprows=2, max_rows=n_atoms, usecols=(0,), dtype=str, ndmin=1).tolist()
+    coordinates = np.loadtxt(path, skiprows=2, max_rows=n_atoms, usecols=(1, 2, 3), dtype=np.float64, ndmin=2)
     
-    return atoms, np.array(coordinates, dtype=float)
+    return atoms, coordinates
 
-def get_distances() -> float:
+def get_distances(xyz_path: str) -> float:
     """Calculate the average interatomic distance for valid bonds in the XYZ file.
     
     A valid bond is defined as a distance between two atoms that is less than or equal to a specified threshold.
 
+    Args:
+        xyz_path (str): Path to the XYZ file written by write_xyz.
     Returns:
         float: The average distance of all valid bonds in Angstroms.
     """
-    dir = os.getcwd()
-    for file in os.listdir(dir):
-        if file.endswith(".xyz"):
-            file_path = os.path.join(dir, file)
-    
-    atoms, coords = read_xyz(file_path)
-    
-    # Convert coordinates to numpy array
-    coords = np.array(coords)
-    
-    # Number of atoms
-    num_atoms = len(atoms)
-    
-    # Calculate the distance between two coordinates (atoms)
-    def distance(coord1, coord2):
-        return np.linalg.norm(np.array(coord1) - np.array(coord2))
-    
-    # Create the pairwise distance matrix (links) using manual calculation
-    pairwise_distances = np.array([[distance(coords[i], coords[j]) for j in range(num_atoms) if i != j] for i in range(num_atoms)])
+    # read_xyz already returns a contiguous float64 array, used as is below
+    atoms, coords = read_xyz(xyz_path)
     
     valid_bond = 2.513
+
+    # Condensed vector with the N(N-1)/2 distances of the unique pairs i < j
+    distances = pdist(coords)
+    
     # Find distances that are less than or equal to valid_bond Å
-    valid_distances = [(i, j, pairwise_distances[i, j - 1]) for i in range(num_atoms) for j in range(i + 1, num_atoms)
-                        if pairwise_distances[i, j - 1] <= valid_bond]
+    valid_distances = distances[distances <= valid_bond]
     
     # Calculate the average distance of all valid bonds
-    average_distance = np.mean([dist for _, _, dist in valid_distances])
+    average_distance = valid_distances.mean()
     return average_distance
 
 
@@ -0,0 +1,39 @@
+"""
+This script runs all the SLURM/ORCA reports over a single SSH connection. Each get_* script
+opens its own connection when run on its own; running them as a batch from here performs the
+SSH handshake only once and passes the same client to every report. get_freq and get_output read
+the same directory, which is scanned once for both.
+Functions:
+    main(): Connects to the SSH server once and runs every report with the shared client, which
+            is closed when the script exits.
+Usage:
+    Run the directory from the repository root so the log files land in tools-and-utilities/slurm:
+        python tools-and-utilities/slurm
+"""
+
+from connection import get_client
+from get_coords import get_coords
+from get_energy import get_energy
+from get_freq import get_freq
+from get_gap import get_gap
+from get_jobs import get_jobs
+from get_magnetic import get_magnetic
+from get_output import get_output, orca_out_directory
+from orca_scan import scan_orca_outputs
+
+def main():
+    # Connect to the SSH server once for all the reports
+    client, username = get_client()
+
+    get_jobs(client, username)
+    get_energy(client)
+    get_coords(client)
+    # get_freq and get_output read the same directory, passed to both with its shared scan
+    scan = scan_orca_outputs(client, orca_out_directory)
+    get_freq(client, orca_out_directory, scan)
+    get_gap(client)
+    get_magnetic(client)
+    get_output(client, orca_out_directory, scan=scan)
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,30 @@ Raises:
     paramiko.AuthenticationException: If authentication fails.
     paramiko.SSHException: If an SSH-related error occurs.
     Exception: If any other error occurs during the connection process.
+get_client() returns the same tuple for a connection shared by every caller in the process,
+connecting on first use and reconnecting if the connection was lost. It uses paramiko, or the
+libssh2 backend of connect_to_ssh2() when the environment variable 'SSH_BACKEND' is 'ssh2'.
+list_out_files() lists the ORCA output files of a remote directory with a single command.
 """
 
+import atexit
+import io
 import paramiko
 import os
+import select
+import socket
+
+try:
+    from ssh2.exceptions import SSH2Error
+    from ssh2.session import (
+        Session, LIBSSH2_FLAG_COMPRESS, LIBSSH2_SESSION_BLOCK_INBOUND, LIBSSH2_SESSION_BLOCK_OUTBOUND)
+except ImportError:
+    # ssh2-python is optional; get_client only uses it when SSH_BACKEND=ssh2
+    Session = None
+
+# Connection shared through get_client, created on first use
+_client = None
+_username = None
 
 def connect_to_ssh():
     # Retrieve values from environment variables
@@ -24,7 +44,8 @@ def connect_to_ssh():
     try:
         client = paramiko.SSHClient()
         client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        client.connect(hostname=hostname, username=username, password=password)
+        # Negotiate zlib compression; the ORCA text sent back by the reports compresses well
+        client.connect(hostname=hostname, username=username, password=password, compress=True)
     except paramiko.AuthenticationException:
         print("Authentication failed. Please check your credentials.")
         raise
@@ -34,5 +55,178 @@ def connect_to_ssh():
     except Exception as e:
         print(f"An error occurred while connecting: {e}")
         raise
+
+    # Open later channels with a 128 MB window so bulk reads are not throttled by window
+    # adjustments, and send small requests without Nagle's delay
+    transport = client.get_transport()
+    transport.default_window_size = 2**27 - 1
+    transport.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
     
     return client, username
+
+class SSH2Client:
+    """
+    Wraps an ssh2-python (libssh2) session in the subset of the paramiko SSHClient interface the
+    reports use: exec_command, get_transport and close. Encryption and framing run in native code,
+    so large outputs are received faster than with paramiko's pure Python transport.
+    """
+
+    def __init__(self, session, sock):
+        self.session = session
+        self.sock = sock
+        self.active = True
+
+    def exec_command(self, command):
+        """Runs a command and returns its whole stdout and stderr as file-like objects."""
+        try:
+            channel = self.session.open_session()
+            channel.execute(command)
+            stdout, stderr = self._read_all(channel)
+            channel.close()
+            channel.wait_closed()
+        except (SSH2Error, OSError):
+            # The session cannot be reused after a transport error, so get_client reconnects
+            self.active = False
+            raise
+        return None, io.BytesIO(stdout), io.BytesIO(stderr)
+
+    def _read_all(self, channel):
+        """
+        Reads stdout and stderr of a channel until EOF. Both streams are drained in the same loop
+        in non-blocking mode, so a command writing a lot to stderr cannot fill the channel window
+        and stall while stdout is being read.
+        """
+        stdout, stderr = [], []
+        self.session.set_blocking(False)
+        try:
+            while True:
+                # Anything received before EOF is read by the drains that follow
+                eof = channel.eof()
+                received = self._drain(channel.read, stdout) + self._drain(channel.read_stderr, stderr)
+                if eof:
+                    break
+                if not received:
+                    self._wait_socket()
+        finally:
+            self.session.set_blocking(True)
+        return b''.join(stdout), b''.join(stderr)
+
+    @staticmethod
+    def _drain(read, chunks):
+        """Appends the data available on a stream to chunks and returns the number of bytes read."""
+        received = 0
+        size, data = read()
+        while size > 0:
+            chunks.append(data)
+            received += size
+            size, data = read()
+        return received
+
+    def _wait_socket(self):
+        """Waits until the socket is ready in the directions libssh2 is blocked on."""
+        directions = self.session.block_directions()
+        if not directions:
+            return
+        readable = [self.sock] if directions & LIBSSH2_SESSION_BLOCK_INBOUND else []
+        writable = [self.sock] if directions & LIBSSH2_SESSION_BLOCK_OUTBOUND else []
+        select.select(readable, writable, [])
+
+    def get_transport(self):
+        return self
+
+    def is_active(self):
+        """
+        Whether the session is still usable. A keepalive is sent if the connection was idle for
+        the set_keepalive interval, and a socket closed by the server reads as EOF without
+        blocking, so a connection dropped while idle is detected here.
+        """
+        if self.active:
+            try:
+                self.session.keepalive_send()
+                readable, _, _ = select.select([self.sock], [], [], 0)
+                if readable and not self.sock.recv(1, socket.MSG_PEEK):
+                    self.active = False
+            except (SSH2Error, OSError):
+                self.active = False
+        return self.active
+
+    def set_keepalive(self, interval):
+        self.session.keepalive_config(False, interval)
+
+    def close(self):
+        if self.active:
+            self.active = False
+            try:
+                self.session.disconnect()
+            except (SSH2Error, OSError):
+                # The connection is already gone
+                pass
+        self.sock.close()
+
+def connect_to_ssh2():
+    """Same as connect_to_ssh, but returns an SSH2Client on a libssh2 session."""
+    # Retrieve values from environment variables
+    hostname = os.getenv('SSH_HOST')
+    username = os.getenv('SSH_USER')
+    password = os.getenv('SSH_PASSWORD')
+
+    # SSH connection
+    try:
+        sock = socket.create_connection((hostname, 22))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        session = Session()
+        # Compression must be requested before the handshake
+        session.flag(LIBSSH2_FLAG_COMPRESS)
+        session.handshake(sock)
+        session.userauth_password(username, password)
+    except Exception as e:
+        print(f"An error occurred while connecting: {e}")
+        raise
+
+    return SSH2Client(session, sock), username
+
+def use_ssh2():
+    """Whether the environment variable 'SSH_BACKEND' selects the ssh2-python backend."""
+    if os.getenv('SSH_BACKEND', 'paramiko') != 'ssh2':
+        return False
+    if Session is None:
+        print("SSH_BACKEND=ssh2 requires ssh2-python. Install it or unset SSH_BACKEND.")
+        raise ImportError("ssh2-python is not installed")
+    return True
+
+def get_client():
+    """Returns the shared SSH client and username, connecting if there is no active connection."""
+    global _client, _username
+    transport = _client.get_transport() if _client is not None else None
+    if transport is None or not transport.is_active():
+        if _client is not None:
+            _client.close()
+        _client, _username = connect_to_ssh2() if use_ssh2() else connect_to_ssh()
+        # Keep the connection alive between calls that take a while on the remote side
+        _client.get_transport().set_keepalive(30)
+    return _client, _username
+
+def list_out_files(client, directory):
+    """
+    Lists the .out files in a remote directory, without the 'slurm-' logs, in the order 'ls'
+    lists them.
+
+    All names are fetched with a single 'ls' over an exec channel, so the whole listing costs one
+    round trip and no SFTP session is left open; callers check for files against this list.
+    Raises:
+        IOError: If the directory cannot be listed.
+    """
+    stdin, stdout, stderr = client.exec_command(f'ls -1 {directory}')
+    files = stdout.read().decode().splitlines()
+    error_message = stderr.read().decode()
+    if error_message:
+        raise IOError(error_message.strip())
+
+    # Filter files that end with .out and do not start with 'slurm-'
+    return [f for f in files if f.endswith('.out') and not f.startswith('slurm-')]
+
+@atexit.register
+def close_client():
+    """Closes the shared SSH client, if any, when the interpreter exits."""
+    if _client is not None:
+        _client.close()
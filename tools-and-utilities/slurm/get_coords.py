@@ -2,75 +2,83 @@
 This script connects to a remote SSH server, lists files in a specified directory, 
 and searches for Cartesian coordinates in ORCA output files. The coordinates are 
 then written to a log file.
+All files are searched backwards by a single remote command, so only the last 
+coordinates block of each file is read and transferred.
 Functions:
     get_coords(): Connects to the SSH server, lists .out files in the specified 
-    directory, searches for Cartesian coordinates in each file, and writes the 
+    directory, greps the Cartesian coordinates of all files at once, and writes the 
     coordinates to a log file. If any errors occur during file listing or reading, 
     they are logged as well.
 """
 
 import os
-from connection import connect_to_ssh
+from connection import get_client, list_out_files
 
 # Define the directory path where the SLURM files are located
 orca_out_directory = '/LUSTRE/home/erenteria/orca/binaries/freq/completed'
 # Define the log file path
 log_file = 'tools-and-utilities/slurm/coords.log'
 
-def get_coords():
-    # Connect to the SSH server
-    client, username = connect_to_ssh()
-    
-    # List all files in the Orca output directory
-    stdin, stdout, stderr = client.exec_command(f'ls {orca_out_directory}')
-    files = stdout.read().decode()
-    error_message = stderr.read().decode()
-    
-    if error_message:
+def get_coords(client):
+    # List the .out files in the Orca output directory, without the 'slurm-' logs
+    try:
+        out_files = list_out_files(client, orca_out_directory)
+    except IOError as error_message:
         print(f"Error listing files: {error_message}")
         return
 
-    # Filter files that end with .out and do not start with 'slurm-'
-    out_files = [f for f in files.splitlines() if f.endswith('.out') and not f.startswith('slurm-')]
+    # Fetch the last coordinates block of all .out files with a single remote command.
+    # The number of atoms n of each file is read from the first "Number of atoms" line, in
+    # the ORCA header, as get_properties.py does. Each file is then read backwards with tac,
+    # so grep -m1 stops at the last keyword near the end of the file; -B prints the n + 1
+    # lines that follow it in the file, the second tac restores their order, and -Z ends
+    # the --label file name with a NUL byte. Files without the header line and the 'slurm-'
+    # logs are skipped, so the logs are never parsed as ORCA output
+    stdin, stdout, stderr = client.exec_command(
+        f'for f in {orca_out_directory}/*.out; do case "$f" in */slurm-*) continue;; esac; '
+        f'n=$(grep -m1 -F "Number of atoms" "$f" | awk \'{{print $NF}}\'); '
+        f'[ -n "$n" ] && tac "$f" | '
+        f'grep -m1 -HZF --label="$f" -B $((n + 1)) "CARTESIAN COORDINATES (ANGSTROEM)" | tac; done')
+    # ORCA output is ASCII, so the matches stay bytes and only the kept blocks are decoded
+    matches = stdout.read()
+    error_message = stderr.read().decode()
+
+    # Block of each file, starting at the keyword line
+    blocks = {}
+    for match in matches.splitlines():
+        out_file_path, separator, line = match.partition(b'\0')
+        if not separator:
+            continue
+        out_file = os.path.basename(out_file_path.decode())
+        if b"CARTESIAN COORDINATES (ANGSTROEM)" in line:
+            blocks[out_file] = [line]
+        else:
+            blocks[out_file].append(line)
 
-    # Search for the keywords in each .out file
+    # Write the coordinates of each .out file
     with open(log_file, 'w') as file:
+        if error_message:
+            file.write(f"Error reading files in {orca_out_directory}: {error_message}\n")
+
         for out_file in out_files:
             out_file_path = os.path.join(orca_out_directory, out_file)
 
-            # Read the content of the .out file
-            stdin, stdout, stderr = client.exec_command(f'cat {out_file_path}')
-            content = stdout.read().decode()
-            error_message = stderr.read().decode()
-            
-            if error_message:
-                file.write(f"Error reading file {out_file_path}: {error_message}\n")
-                continue
-            
-            n = 38 # Number of atoms
-
-            # Check if the keyword "CARTESIAN COORDINATES (ANGSTROEM)" is in the file content
-            if "CARTESIAN COORDINATES (ANGSTROEM)" in content:
-                # Split the content into lines
-                lines = content.splitlines()
-                # Iterate over the lines in reverse order to find the keyword
-                for i in range(len(lines) - 1, -1, -1):
-                    if "CARTESIAN COORDINATES (ANGSTROEM)" in lines[i]:
-                        # Extract the coordinates lines following the keyword
-                        coordinates = lines[i+2:i+2+n]
-                        # Write the number of atoms and file name to the log file
-                        file.write(f"\n{n}\n")
-                        file.write(f"File: {out_file}\n")
-                        # Write each coordinate line to the log file
-                        for coord_line in coordinates:
-                            file.write(f"{coord_line}\n")
-                        break
+            if out_file in blocks:
+                # Extract the coordinates lines following the keyword
+                coordinates = blocks[out_file][2:]
+                n = len(coordinates) # Number of atoms
+                # Write the number of atoms and file name to the log file
+                file.write(f"\n{n}\n")
+                file.write(f"File: {out_file}\n")
+                # Write each coordinate line to the log file
+                for coord_line in coordinates:
+                    file.write(f"{coord_line.decode()}\n")
             else:
                 # If the keyword is not found, log the information
-                # If the keyword is not found
                 file.write(f"File: {out_file_path}\n")
                 file.write("Keyword 'CARTESIAN COORDINATES (ANGSTROEM)' not found.\n\n")
 
-    client.close()
-
-get_coords()
+if __name__ == "__main__":
+    # Connect to the SSH server, closed when the script exits
+    client, username = get_client()
+    get_coords(client)
@@ -1,69 +1,69 @@
 """
 This script connects to a remote SSH server, lists all files in a specified directory,
 and searches for the keyword "FINAL SINGLE POINT ENERGY" in each file that ends with .out
-and does not start with 'slurm-'. The results are logged into a specified log file.
+and does not start with 'slurm-'. All files are searched backwards by a single remote command,
+so only the last matching line of each file is read and transferred. The results are logged into a specified log file.
 Functions:
-    get_energy(): Connects to the SSH server, lists files, searches for the keyword in each file,
+    get_energy(): Connects to the SSH server, lists files, greps the keyword in all files at once,
                   and logs the results.
 Dependencies:
     - os
-    - connection (a module that provides the connect_to_ssh function)
+    - connection (a module that provides the get_client function)
 Usage:
     Run the script to connect to the SSH server, process the files, and generate the log file.
 """
 
 import os
-from connection import connect_to_ssh
+from connection import get_client, list_out_files
 
 # Define the directory path where the SLURM files are located
 orca_out_directory = '/LUSTRE/home/erenteria/orca/binaries/opt'
 # Define the log file path
 log_file = 'tools-and-utilities/slurm/energy.log'
 
-def get_energy():
-    # Connect to the SSH server
-    client, username = connect_to_ssh()
-    
-    # List all files in the Orca output directory
-    stdin, stdout, stderr = client.exec_command(f'ls {orca_out_directory}')
-    files = stdout.read().decode()
-    error_message = stderr.read().decode()
-    
-    if error_message:
+def get_energy(client):
+    # List the .out files in the Orca output directory, without the 'slurm-' logs
+    try:
+        out_files = list_out_files(client, orca_out_directory)
+    except IOError as error_message:
         print(f"Error listing files: {error_message}")
         return
 
-    # Filter files that end with .out and do not start with 'slurm-'
-    out_files = [f for f in files.splitlines() if f.endswith('.out') and not f.startswith('slurm-')]
+    # Fetch the last energy line of every .out file with a single remote command.
+    # Each file is read backwards with tac, so grep -m1 stops at the last energy near
+    # the end of the file; -Z ends the --label file name with a NUL byte instead of ':'.
+    # The 'slurm-' logs are skipped so they are never parsed as ORCA output
+    stdin, stdout, stderr = client.exec_command(
+        f'for f in {orca_out_directory}/*.out; do case "$f" in */slurm-*) continue;; esac; '
+        f'tac "$f" | '
+        f'grep -m1 -HZF --label="$f" "FINAL SINGLE POINT ENERGY "; done')
+    # ORCA output is ASCII, so the matches stay bytes and only the kept lines are decoded
+    matches = stdout.read()
+    error_message = stderr.read().decode()
+
+    # "FINAL SINGLE POINT ENERGY " line of each file
+    energy_lines = {}
+    for match in matches.splitlines():
+        out_file_path, _, line = match.partition(b'\0')
+        energy_lines[os.path.basename(out_file_path.decode())] = line
 
-    # Search for the keywords in each .out file
+    # Write the energy of each .out file
     with open(log_file, 'w') as file:
+        if error_message:
+            file.write(f"Error reading files in {orca_out_directory}: {error_message}\n")
+
         for out_file in out_files:
             out_file_path = os.path.join(orca_out_directory, out_file)
 
-            # Read the content of the .out file
-            stdin, stdout, stderr = client.exec_command(f'cat {out_file_path}')
-            content = stdout.read().decode()
-            error_message = stderr.read().decode()
-            
-            if error_message:
-                file.write(f"Error reading file {out_file_path}: {error_message}\n")
-                continue
-
-            # Search for "FINAL SINGLE POINT ENERGY"
-            if "FINAL SINGLE POINT ENERGY " in content:
-                # Find the line with "FINAL SINGLE POINT ENERGY "
-                lines = content.splitlines()
-                for line in reversed(lines):
-                    if "FINAL SINGLE POINT ENERGY " in line:
-                        file.write(f"File: {out_file}\n")
-                        file.write(f"{line}\n\n")
-                        break
+            if out_file in energy_lines:
+                file.write(f"File: {out_file}\n")
+                file.write(f"{energy_lines[out_file].decode()}\n\n")
             else:
                 # If the keyword is not found
                 file.write(f"File: {out_file_path}\n")
                 file.write("Keyword 'FINAL SINGLE POINT ENERGY ' not found.\n\n")
 
-    client.close()
-
-get_energy()
+if __name__ == "__main__":
+    # Connect to the SSH server, closed when the script exits
+    client, username = get_client()
+    get_energy(client)
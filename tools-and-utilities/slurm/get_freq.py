@@ -1,69 +1,65 @@
 """
 This script connects to a remote server via SSH, lists all files in a specified directory,
 and searches for vibrational frequency information in ORCA output files. It logs the number
-of imaginary frequencies found in each file to a log file.
+of imaginary frequencies found in each file to a log file. All files are searched by a single
+remote grep, shared with get_output, so only the match counts are transferred.
 Functions:
-    get_freq(): Connects to the SSH server, lists ORCA output files, searches for vibrational
-                frequency information, and logs the results.
+    get_freq(client, directory, scan): Lists ORCA output files in the given directory (by default
+                the one below), greps the vibrational frequency information of all files at once,
+                unless the result of scan_orca_outputs is passed as scan, and logs the results.
 Dependencies:
     - os: For file path manipulation.
     - connection: Custom module for establishing SSH connections.
+    - orca_scan: Custom module with the remote scan shared with get_output.
 Usage:
     Run the script to connect to the remote server, process the ORCA output files, and log
     the results to the specified log file.
 """
 
 import os
-from connection import connect_to_ssh
+from connection import get_client, list_out_files
+from orca_scan import scan_orca_outputs
 
 # Define the directory path where the SLURM files are located
 orca_out_directory = '/LUSTRE/home/erenteria/orca/binaries/freq'
 # Define the log file path
 log_file = 'tools-and-utilities/slurm/freq.log'
 
-def get_freq():
-    # Connect to the SSH server
-    client, username = connect_to_ssh()
-    
-    # List all files in the Orca output directory
-    stdin, stdout, stderr = client.exec_command(f'ls {orca_out_directory}')
-    files = stdout.read().decode()
-    error_message = stderr.read().decode()
-    
-    if error_message:
+def get_freq(client, directory=orca_out_directory, scan=None):
+    # Drop trailing slashes so the paths written to the log match the default directory
+    directory = os.path.normpath(directory)
+
+    # List the .out files in the Orca output directory, without the 'slurm-' logs
+    try:
+        out_files = list_out_files(client, directory)
+    except IOError as error_message:
         print(f"Error listing files: {error_message}")
         return
 
-    # Filter files that end with .out and do not start with 'slurm-'
-    out_files = [f for f in files.splitlines() if f.endswith('.out') and not f.startswith('slurm-')]
+    # Count both keywords in all .out files, unless the caller already ran the remote scan for
+    # get_output as well. The tails are only needed by get_output, so n=0 skips them
+    if scan is None:
+        scan = scan_orca_outputs(client, directory, n=0)
+    tails, vibrational, imaginary_counts, error_message = scan
 
-    # Search for the keywords in each .out file
+    # Log the number of imaginary frequencies of each .out file
     with open(log_file, 'w') as file:
-        for out_file in out_files:
-            out_file_path = os.path.join(orca_out_directory, out_file)
+        if error_message:
+            file.write(f"Error reading files in {directory}: {error_message}\n")
 
-            # Read the content of the .out file
-            stdin, stdout, stderr = client.exec_command(f'cat {out_file_path}')
-            content = stdout.read().decode()
-            error_message = stderr.read().decode()
-            
-            if error_message:
-                file.write(f"Error reading file {out_file_path}: {error_message}\n")
-                continue
+        for out_file in out_files:
+            out_file_path = os.path.join(directory, out_file)
 
-            # Search for "VIBRATIONAL FREQUENCIES"
-            if "VIBRATIONAL FREQUENCIES" in content:
-                # Count occurrences of "***imaginary mode***"
-                imaginary_count = content.count("***imaginary mode***")
-                
+            if out_file in vibrational:
                 # Log the result
                 file.write(f"File: {out_file}\n")
-                file.write(f"Number of imaginary frequencies: {imaginary_count}\n\n")
+                file.write(f"Number of imaginary frequencies: {imaginary_counts[out_file]}\n\n")
             else:
                 # If the keyword is not found
                 file.write(f"File: {out_file_path}\n")
                 file.write("Keyword 'VIBRATIONAL FREQUENCIES' not found.\n\n")
 
-    client.close()
-
-get_freq()
+if __name__ == "__main__":
+    # Connect to the SSH server, closed when the script exits
+    client, username = get_client()
+    get_freq(client)
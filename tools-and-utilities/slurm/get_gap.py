@@ -1,81 +1,81 @@
 """
 This script connects to a remote server via SSH, lists all .out files in a specified directory,
 and extracts the HOMO-LUMO gap from each file. The results are logged into a specified log file.
+The orbital listings of all files are extracted by a single remote awk, so only those
+sections are transferred.
 Functions:
-    get_gap(): Connects to the SSH server, lists .out files, reads their content, searches for
-               the "SPIN DOWN ORBITALS" section, extracts the HOMO and LUMO energies, calculates
+    get_gap(): Connects to the SSH server, lists .out files, fetches their last orbital listing
+               ending at the "SPIN DOWN ORBITALS" section, extracts the HOMO and LUMO energies, calculates
                the HOMO-LUMO gap, and writes the results to a log file.
 Dependencies:
     - os
-    - connection (connect_to_ssh function)
+    - connection (get_client function)
 Usage:
     Call the get_gap() function to execute the script.
 """
 
 import os
-from connection import connect_to_ssh
+import re
+from connection import get_client, list_out_files
 
 # Define the directory path where the SLURM files are located
 orca_out_directory = '/LUSTRE/home/erenteria/orca/binaries/freq/completed'
 # Define the log file path
 log_file = 'tools-and-utilities/slurm/gap.log'
+# awk program printing, for every file, its last block of lines from "SPIN UP ORBITALS"
+# to "SPIN DOWN ORBITALS" after a "==> path <==" header
+ORBITALS_AWK = (
+    'FNR == 1 { if (block != "") printf "==> %s <==\\n%s", name, block; name = FILENAME; block = ""; on = 0 } '
+    '/SPIN UP ORBITALS/ { buf = ""; on = 1 } '
+    'on { buf = buf $0 "\\n" } '
+    '/SPIN DOWN ORBITALS/ { if (on) block = buf; on = 0 } '
+    'END { if (block != "") printf "==> %s <==\\n%s", name, block }'
+)
+# "==> path <==" header lines written by ORBITALS_AWK
+HEADER_RE = re.compile(rb'^==> (.*) <==\n', re.M)
+# Orbital lines "NO OCC E(Eh) E(eV)", capturing the occupation and the energy in eV
+ORBITAL_RE = re.compile(rb'^[ \t]*\d+[ \t]+(\d+\.\d+)[ \t]+-?\d+\.\d+[ \t]+(-?\d+\.\d+)[ \t]*$', re.M)
 
-def get_gap():
-    # Connect to the SSH server
-    client, username = connect_to_ssh()
-    
-    # List all files in the Orca output directory
-    stdin, stdout, stderr = client.exec_command(f'ls {orca_out_directory}')
-    files = stdout.read().decode()
-    error_message = stderr.read().decode()
-    
-    if error_message:
+def get_gap(client):
+    # List the .out files in the Orca output directory, without the 'slurm-' logs
+    try:
+        out_files = list_out_files(client, orca_out_directory)
+    except IOError as error_message:
         print(f"Error listing files: {error_message}")
         return
 
-    # Filter files that end with .out and do not start with 'slurm-'
-    out_files = [f for f in files.splitlines() if f.endswith('.out') and not f.startswith('slurm-')]
+    # Fetch the last orbital listing of all .out files with a single remote awk;
+    # each listing is preceded by a "==> path <==" header line
+    stdin, stdout, stderr = client.exec_command(f"awk '{ORBITALS_AWK}' {orca_out_directory}/*.out")
+    # ORCA output is ASCII, so the listings are parsed as bytes without decoding them
+    listings = stdout.read()
+    error_message = stderr.read().decode()
+
+    # Text from "SPIN UP ORBITALS" to "SPIN DOWN ORBITALS" of each file; splitting on the
+    # headers gives [b'', path, block, path, block, ...]
+    parts = HEADER_RE.split(listings)
+    sections = {os.path.basename(path.decode()): block for path, block in zip(parts[1::2], parts[2::2])}
 
     # Search for the keywords in each .out file
     with open(log_file, 'w') as file:
         file.write("***HOMO-LUMO Gaps:***\n")
-        for out_file in out_files:
-            out_file_path = os.path.join(orca_out_directory, out_file)
-
-            # Read the content of the .out file
-            stdin, stdout, stderr = client.exec_command(f'cat {out_file_path}')
-            content = stdout.read().decode()
-            error_message = stderr.read().decode()
-            
-            if error_message:
-                file.write(f"Error reading file {out_file_path}: {error_message}\n")
-                continue
+        if error_message:
+            file.write(f"Error reading files in {orca_out_directory}: {error_message}\n")
 
-            lines = content.splitlines()
-            found_section = False
+        for out_file in out_files:
             homo, lumo = None, None
-            
-            # Search for the section "SPIN DOWN ORBITALS"
-            for line in reversed(lines):
-                if "SPIN DOWN ORBITALS" in line:
-                    found_section = True
-                    i = lines.index(line)
-                    continue
-            
-            # Get the number of orbitals from the line two lines above the "SPIN DOWN ORBITALS" section
-            n_orb = int(lines[i-2].split()[0])
 
-            if found_section:
-                # Iterate over the orbitals to find the HOMO and LUMO
-                for j in range(n_orb):
-                    parts = lines[i-j].split()
-                    # Check if the line corresponds to an occupied orbital (HOMO)
-                    if len(parts) == 4 and parts[1] == "1.0000":
-                        homo = float(parts[3])
-                        lumo_parts = lines[i-j+1].split()
-                        # Get the energy of the next orbital (LUMO)
-                        lumo = float(lumo_parts[3])
-                        break
+            # (occupation, energy) of the spin up orbitals in a single regex pass
+            orbitals = ORBITAL_RE.findall(sections.get(out_file, b""))
+
+            # Iterate over the orbitals from the last one to find the HOMO and LUMO
+            for k in range(len(orbitals) - 2, -1, -1):
+                # Check if the orbital is occupied (HOMO)
+                if orbitals[k][0] == b"1.0000":
+                    homo = float(orbitals[k][1])
+                    # Get the energy of the next orbital (LUMO)
+                    lumo = float(orbitals[k+1][1])
+                    break
             
             # Write the file path to the log file
             file.write(f"\nFile: {out_file}\n")
@@ -88,6 +88,7 @@ def get_gap():
             else:
                 file.write("HOMO and/or LUMO not found.\n")
 
-    client.close()
-
-get_gap()
+if __name__ == "__main__":
+    # Connect to the SSH server, closed when the script exits
+    client, username = get_client()
+    get_gap(client)
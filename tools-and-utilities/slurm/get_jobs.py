@@ -3,28 +3,30 @@ This script connects to an SSH server to retrieve and log the status of jobs in
 It fetches the list of jobs in pending and running states for the current user, as well as the complete list of jobs,
 and saves this information to a log file.
 Functions:
-    check_jobs(): Connects to the SSH server, retrieves job information, and writes it to a log file.
+    get_jobs(): Retrieves job information over the given SSH client and writes it to a log file.
 Usage:
-    The script can be scheduled to run periodically using the `schedule` library. Uncomment the scheduling
-    section to run the `check_jobs` function every hour.
+    The script checks the jobs once and exits. To check them periodically, schedule it with cron from the
+    repository root, e.g. every hour with the crontab entry:
+        0 * * * * cd /path/to/computational-chemistry && /usr/bin/python3 tools-and-utilities/slurm/get_jobs.py
+    For intervals cron cannot express, use a systemd timer with OnCalendar= instead. Where neither is
+    available, `--every SECONDS` keeps the script running and checks the jobs again at that interval,
+    sleeping in between:
+        python tools-and-utilities/slurm/get_jobs.py --every 3600
 Dependencies:
-    - schedule
+    - argparse
     - time
     - datetime
     - connection (custom module to handle SSH connections)
 """
 
-import schedule
+import argparse
 import time
 import datetime
-from connection import connect_to_ssh
+from connection import get_client
 
 log_file = 'tools-and-utilities/slurm/jobs.log'
 
-def get_jobs():
-    # Connect to the SSH server
-    client, username = connect_to_ssh()
-
+def get_jobs(client, username):
     # Command to get the list of jobs for the user in pending state
     stdin, stdout, stderr = client.exec_command(f'squeue -u {username} -t PD')
     jobs_user_pending = stdout.read().decode()
@@ -46,15 +48,21 @@ def get_jobs():
         file.write("\nList of jobs:\n")
         file.write(jobs)
         print(f"Jobs checked and saved to jobs.log at {datetime.datetime.now()}")
-    
-    client.close()
-
-get_jobs()
 
-# Schedule the task to run every 1 hour
-# schedule.every(1).hour.do(check_jobs)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the SLURM jobs and save them to jobs.log.")
+    parser.add_argument("--every", type=float, metavar="SECONDS",
+                        help="check the jobs again every SECONDS instead of only once")
+    args = parser.parse_args()
 
-# # Run the scheduled task in a loop
-# while True:
-#     schedule.run_pending()
-#     time.sleep(1)
+    next_check = time.time()
+    while True:
+        # Connect to the SSH server, reconnecting if the connection was lost while sleeping;
+        # closed when the script exits
+        client, username = get_client()
+        get_jobs(client, username)
+        if args.every is None:
+            break
+        # Sleep until the next check, measured from the previous one so the checks do not drift
+        next_check += args.every
+        time.sleep(max(0, next_check - time.time()))
@@ -5,93 +5,100 @@ Functions:
     get_magnetic(): Connects to the SSH server, lists ORCA output files, extracts magnetic properties,
                     and writes the results to a log file.
 Details:
-- Connects to the SSH server using the `connect_to_ssh` function from the `connection` module.
-- Lists all files in the specified ORCA output directory.
+- Connects to the SSH server using the `get_client` function from the `connection` module.
+- Lists all files in the specified ORCA output directory with a single remote command.
 - Filters files that end with '.out' and do not start with 'slurm-'.
-- Reads the content of each filtered file and searches for the section "Sum of atomic charges".
+- Reads all the files backwards with a single remote command, which returns only the atom lines of the
+  last section ending with "Sum of atomic charges" and the last line "Sum of atomic spin populations".
 - Calculates the sum of atomic spin populations for each element.
 - Writes the results to the specified log file, including the sum of spins per element and the line
   "Sum of atomic spin populations" if found.
 """
 
 import os
+import re
 from collections import defaultdict
-from connection import connect_to_ssh
+from connection import get_client, list_out_files
 
 # Define the directory path where the SLURM files are located
 orca_out_directory = '/LUSTRE/home/erenteria/orca/binaries/freq/completed'
 # Define the log file path
 log_file = 'tools-and-utilities/slurm/magnetic.log'
+# awk program run on each file read backwards with tac. It prints the atom lines above the last
+# "Sum of atomic charges" line, up to the first line that does not start with an atom index, and
+# then the last "Sum of atomic spin populations" line, exiting as soon as both have been found
+SPIN_POPULATIONS_AWK = (
+    '/Sum of atomic charges/ && !done { found = 1; next } '
+    'found && !done { if ($1 ~ /^[0-9]+$/) { print; next } done = 1 } '
+    '!spin && /Sum of atomic spin populations/ { spin = $0 } '
+    'done && spin { exit } '
+    'END { if (spin) print spin }'
+)
+# Atom lines "INDEX ELEMENT CHARGE SPIN", capturing the element and the spin population
+ATOM_RE = re.compile(rb'^[ \t]*\d+[ \t]+(\S+)[ \t]+\S+[ \t]+(-?\d+\.\d+)[ \t]*$', re.M)
 
-def get_magnetic():
-    # Connect to the SSH server
-    client, username = connect_to_ssh()
-    
-    # List all files in the Orca output directory
-    stdin, stdout, stderr = client.exec_command(f'ls {orca_out_directory}')
-    files = stdout.read().decode()
-    error_message = stderr.read().decode()
-    
-    if error_message:
+def get_magnetic(client):
+    # List the .out files in the Orca output directory, without the 'slurm-' logs
+    try:
+        out_files = list_out_files(client, orca_out_directory)
+    except IOError as error_message:
         print(f"Error listing files: {error_message}")
         return
 
-    # Filter files that end with .out and do not start with 'slurm-'
-    out_files = [f for f in files.splitlines() if f.endswith('.out') and not f.startswith('slurm-')]
+    # Fetch the spin populations of all .out files with a single remote command, so only a
+    # few lines per file are transferred. The lines of each file are preceded by a NUL byte
+    # and the file path, which never occur in ORCA output
+    stdin, stdout, stderr = client.exec_command(
+        f'for f in {orca_out_directory}/*.out; do case "$f" in */slurm-*) continue;; esac; '
+        f'printf \'\\0FILE:%s\\n\' "$f"; tac -- "$f" | awk \'{SPIN_POPULATIONS_AWK}\'; done')
+    # ORCA output is ASCII, so the lines stay bytes and are matched with ATOM_RE
+    output = stdout.read()
+    error_message = stderr.read().decode()
+
+    # Lines of each file, in reverse file order
+    spin_lines = {}
+    for lines in output.split(b'\0FILE:')[1:]:
+        out_file_path, _, lines = lines.partition(b'\n')
+        spin_lines[os.path.basename(out_file_path.decode())] = lines
+
+    # Build the log in memory and write it with a single call
+    log = []
+    if error_message:
+        log.append(f"Error reading files in {orca_out_directory}: {error_message}\n")
 
     # Search for the keywords in each .out file
-    with open(log_file, 'w') as file:
-        file.write("***MULLIKEN ATOMIC SPIN POPULATIONS:***\n")
-        for out_file in out_files:
-            out_file_path = os.path.join(orca_out_directory, out_file)
+    log.append("***MULLIKEN ATOMIC SPIN POPULATIONS:***\n")
+    # Sum of spins per element, emptied for each file instead of creating a new dictionary
+    spin_sums = defaultdict(float)
+    for out_file in out_files:
+        lines = spin_lines.get(out_file, b'')
+        spin_sums.clear()
+        
+        # Add the spin population of each atom to the corresponding element in the dictionary
+        for match in ATOM_RE.finditer(lines):
+            spin_sums[match[1].decode()] += float(match[2])
+        # The "Sum of atomic spin populations" line, printed last by the awk program
+        idx = lines.rfind(b"Sum of atomic spin populations")
 
-            # Read the content of the .out file
-            stdin, stdout, stderr = client.exec_command(f'cat {out_file_path}')
-            content = stdout.read().decode()
-            error_message = stderr.read().decode()
-            
-            if error_message:
-                file.write(f"Error reading file {out_file_path}: {error_message}\n")
-                continue
-            
-            lines = content.splitlines()
-            spin_sums = defaultdict(float)
-            found_section = False
-            
-            # Search for the section "Sum of atomic charges"
-            for line in reversed(lines):
-                if "Sum of atomic charges" in line:
-                    found_section = True
-                    continue
-                
-                if found_section:
-                    # Split the line into parts
-                    parts = line.split()
-                    # Check if the line has 4 parts and the first part is a digit
-                    if len(parts) == 4 and parts[0].isdigit():
-                        element = parts[1]
-                        spin_population = float(parts[3])
-                        # Add the spin population to the corresponding element in the dictionary
-                        spin_sums[element] += spin_population
-                    # Break the loop if the line does not have 4 parts or the first part is not a digit
-                    elif not parts or not parts[0].isdigit():
-                        break
+        log.append(f"\nFile: {out_file}\n")
+        
+        # Write the sum of spins per element
+        log.extend(f"{element} {total_spin:.6f} " for element, total_spin in spin_sums.items())
+        
+        # Write the line "Sum of atomic spin populations"
+        if idx >= 0:
+            # awk ends every line it prints with a newline
+            start = lines.rfind(b"\n", 0, idx) + 1
+            spin_line = lines[start:lines.find(b"\n", idx)].decode()
+            log.append(f"\n{spin_line}")
+            log.append(f"\nAvg: {(float(spin_line.split()[5]) / 38):.6f}\n")
+        else:
+            log.append("\nKeyword 'Sum of atomic spin populations' not found.\n")
 
-            file.write(f"\nFile: {out_file}\n")
-            
-            # Write the sum of spins per element
-            for element, total_spin in spin_sums.items():
-                file.write(f"{element} {total_spin:.6f} ")
-            
-            # Search and write the line "Sum of atomic spin populations"
-            for line in reversed(lines):
-                if "Sum of atomic spin populations" in line:
-                    file.write(f"\n{line}")
-                    file.write(f"\nAvg: {(float(line.split()[5]) / 38):.6f}\n")
-                    break
-            else:
-                file.write("\nKeyword 'Sum of atomic spin populations' not found.\n")
-    
-    client.close()
+    with open(log_file, 'w') as file:
+        file.write(''.join(log))
 
-get_magnetic()
+if __name__ == "__main__":
+    # Connect to the SSH server, closed when the script exits
+    client, username = get_client()
+    get_magnetic(client)
@@ -1,56 +1,54 @@
 """
 This script connects to a remote server via SSH, lists all files in a specified directory,
 filters out files that end with '.out' and do not start with 'slurm-', and fetches the last
-5 lines of each filtered file. The fetched output is then saved into a log file.
+5 lines of every filtered file with a single remote command, shared with get_freq. The fetched
+output is then saved into a log file.
 Functions:
-    get_output(): Connects to the SSH server, lists files in the specified directory,
-                  filters and fetches the last 5 lines of each relevant file, and writes
-                  the output to a log file.
+    get_output(client, directory, log_path, n, scan): Lists files in the given directory (by
+                  default the one below), fetches the last n lines of all relevant files at once,
+                  unless the result of scan_orca_outputs is passed as scan, and writes the output
+                  to the given log file.
 """
 
 import os
-from connection import connect_to_ssh
+from connection import get_client, list_out_files
+from orca_scan import scan_orca_outputs
 
 # Define the directory path where the SLURM files are located
 orca_out_directory = '/LUSTRE/home/erenteria/orca/binaries/freq'
 # Define the log file path
 log_file = 'tools-and-utilities/slurm/output.log'
 
-def get_output():
-    # Connect to the SSH server
-    client, username = connect_to_ssh()
+def get_output(client, directory=orca_out_directory, log_path=log_file, n=5, scan=None):
+    # Drop trailing slashes so the paths written to the log match the default directory
+    directory = os.path.normpath(directory)
 
-    # List all files in the Orca output directory
-    stdin, stdout, stderr = client.exec_command(f'ls {orca_out_directory}')
-    files = stdout.read().decode()
-    error_message = stderr.read().decode()
-    
-    if error_message:
+    # List the .out files in the Orca output directory, without the 'slurm-' logs
+    try:
+        out_files = list_out_files(client, directory)
+    except IOError as error_message:
         print(f"Error listing files: {error_message}")
         return
 
-    # Filter files that end with .out and do not start with 'slurm-'
-    out_files = [f for f in files.splitlines() if f.endswith('.out') and not f.startswith('slurm-')]
+    # Fetch the latest n lines of all .out files, unless the caller already ran the remote scan
+    # for get_freq as well
+    if scan is None:
+        scan = scan_orca_outputs(client, directory, n=n)
+    tails, vibrational, imaginary_counts, error_message = scan
+
+    with open(log_path, 'w') as file:
+        if error_message:
+            file.write(f"Error fetching output in {directory}: {error_message}\n")
 
-    # Fetch the latest 5 lines of each .out file
-    with open(log_file, 'w') as file:
         for out_file in out_files:
-            out_file_path = os.path.join(orca_out_directory, out_file)
-            
-            # Execute the 'tail' command to get the last 5 lines of the .out file
-            stdin, stdout, stderr = client.exec_command(f'tail -n 5 {out_file_path}')
-            output = stdout.read().decode()
-            error_message = stderr.read().decode()
-            
-            if error_message:
-                file.write(f"Error fetching output for {out_file_path}: {error_message}\n")
-                continue
+            out_file_path = os.path.join(directory, out_file)
 
             # Save the result into the log file
             file.write(f"Latest output for {out_file_path}:\n")
-            file.write(output)
+            file.write(tails.get(out_file, b'').decode())
             file.write("\n\n")  # Add separation between files
 
-    client.close()
-
-get_output()
\ No newline at end of file
+if __name__ == "__main__":
+    # Connect to the SSH server, closed when the script exits
+    client, username = get_client()
+    get_output(client)
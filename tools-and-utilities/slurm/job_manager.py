@@ -10,7 +10,8 @@ Functions:
     by querying the SLURM queue using the `squeue` command.
 - find_jobs_to_submit() -> list:
     Identifies `.slurm` job files in the current directory that do not have a corresponding `.out` 
-    file, indicating that they have not yet been executed.
+    file, indicating that they have not yet been executed. The directory is only rescanned when its 
+    modification time changes, or the unchanged time was only seen once.
 - main():
     The main function orchestrates the job submission process. It continuously monitors the SLURM 
     queue, submits jobs from the list of pending `.slurm` files while respecting the maximum allowed 
@@ -21,35 +22,56 @@ and submit jobs that have not been executed, ensuring that the number of pending
 exceed the defined limit.
 """
 import os
+import shutil
 import subprocess
 import time
-from collections import defaultdict
 
 def check_current_jobs(username: str) -> tuple:
     """Gets the number of jobs in Running (R) and Pending (PD) states"""
-    cmd = f"squeue -u {username} -o '%T' --noheader"
+    # Run squeue directly instead of through a shell, listing only running and pending jobs
+    cmd = ['squeue', '-u', username, '-t', 'RUNNING,PENDING', '-o', '%T', '--noheader']
     result = subprocess.run(
         cmd,
-        shell=True,
         stdout=subprocess.PIPE,  # Replace capture_output
         stderr=subprocess.PIPE,
         universal_newlines=True  # Equivalent to text=True in Python 3.6
     )
     
-    states = defaultdict(int)
+    # Only RUNNING and PENDING are listed, so the first letter tells them apart
+    running = pending = 0
     for state in result.stdout.splitlines():
-        states[state.strip()] += 1
+        if state.startswith('R'):
+            running += 1
+        elif state.startswith('P'):
+            pending += 1
         
-    return states.get('RUNNING', 0), states.get('PENDING', 0)
+    return running, pending
+
+# Files found by the last directory scan, reused while the directory is unchanged. Lustre and NFS
+# can report directory mtimes with one second granularity, so a file created in the same second as
+# a scan leaves the mtime unchanged. The listing is therefore only trusted once the same mtime has
+# been seen on two consecutive polls, which rescans one poll interval after every change
+_scan_cache = {'mtime': None, 'stable': False, 'slurm': [], 'out': set()}
 
 def find_jobs_to_submit():
     """Finds jobs that have not been executed (missing .out file)"""
-    all_files = os.listdir('.')
-    slurm_files = [f for f in all_files if f.endswith('.slurm')]
-    out_files = set([f for f in all_files if f.endswith('.out')])
+    # Rescan the directory unless its mtime was already unchanged on the previous poll
+    mtime = os.stat('.').st_mtime_ns
+    if mtime != _scan_cache['mtime'] or not _scan_cache['stable']:
+        slurm_files = []
+        out_files = set()
+        with os.scandir('.') as entries:
+            for entry in entries:
+                if entry.name.endswith('.slurm'):
+                    slurm_files.append(entry.name)
+                elif entry.name.endswith('.out'):
+                    out_files.add(entry.name)
+        _scan_cache.update(stable=mtime == _scan_cache['mtime'], mtime=mtime,
+                           slurm=slurm_files, out=out_files)
+    out_files = _scan_cache['out']
     
     jobs_to_submit = []
-    for slurm in slurm_files:
+    for slurm in _scan_cache['slurm']:
         expected_out = slurm.replace('.slurm', '.out')
         if expected_out not in out_files:
             jobs_to_submit.append(slurm)
@@ -60,6 +82,12 @@ def main():
     username = os.getenv('USER')
     max_pending = 5
     poll_interval = 60  # seconds
+    # Resolve sbatch once; running it by absolute path without a shell and with close_fds=False
+    # lets subprocess start it with posix_spawn instead of fork+exec (Python 3.8+)
+    sbatch = shutil.which('sbatch')
+    if sbatch is None:
+        print("sbatch not found in PATH")
+        return
 
     while True:
         running, pending = check_current_jobs(username)
@@ -77,13 +105,13 @@ def main():
             next_job = jobs_to_submit.pop(0)
             
             # Submit job (Python 3.6 compatible version)
-            cmd = f"sbatch {next_job}"
+            cmd = [sbatch, next_job]
             result = subprocess.run(
                 cmd,
-                shell=True,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                universal_newlines=True
+                universal_newlines=True,
+                close_fds=False
             )
             
             if result.returncode == 0:
@@ -0,0 +1,64 @@
+"""
+This module collects, with a single remote command, what the reports on a directory of ORCA output
+files need from each file: its last lines (get_output) and its "VIBRATIONAL FREQUENCIES" and
+"***imaginary mode***" matches (get_freq). Both reports read the same directory, so when they run
+together, e.g. from __main__.py, the caller scans it once and passes the result to both.
+Functions:
+    scan_orca_outputs(client, directory, n): Runs the fused remote command on the .out files of a
+                                             directory and returns the last n lines and keyword
+                                             counts of each file. n=0 skips the tails.
+Dependencies:
+    - os
+    - collections
+"""
+
+import os
+from collections import defaultdict
+
+def scan_orca_outputs(client, directory, n=5):
+    """
+    Returns:
+        tuple: A tuple containing:
+            - tails (dict[str, bytes]): The last n lines of each file, by file name. Empty when
+              n is 0, for callers that only need the keyword counts.
+            - vibrational (set[str]): Names of the files with a "VIBRATIONAL FREQUENCIES" section.
+            - imaginary_counts (defaultdict[str, int]): Number of "***imaginary mode***" per file name.
+            - error_message (str): Anything the remote command wrote to stderr.
+    """
+    # Fetch the latest n lines of all .out files, each preceded by a NUL byte and the file
+    # path, which never occur in ORCA output. Then count both keywords in all files with a
+    # single grep; -o prints each match and -Z ends the file name with a NUL byte. grep
+    # prints the matches of each file in order, so uniq -c collapses them into one
+    # "count file\0keyword" line per run and only a few lines per file are transferred
+    tails_command = ''
+    if n > 0:
+        tails_command = (
+            f'for f in {directory}/*.out; do case "$f" in */slurm-*) continue;; esac; '
+            f'printf \'\\0FILE:%s\\n\' "$f"; tail -n {n} -- "$f"; done; ')
+    stdin, stdout, stderr = client.exec_command(
+        f'{tails_command}printf \'\\0COUNTS\\n\'; '
+        f'grep -HoZF -e "VIBRATIONAL FREQUENCIES" -e "***imaginary mode***" {directory}/*.out | uniq -c')
+    # ORCA output is ASCII, so the output is split and compared as bytes
+    output = stdout.read()
+    error_message = stderr.read().decode()
+    outputs, _, matches = output.partition(b'\0COUNTS\n')
+
+    # Latest output of each file
+    tails = {}
+    for tail in outputs.split(b'\0FILE:')[1:]:
+        out_file_path, _, tail = tail.partition(b'\n')
+        tails[os.path.basename(out_file_path.decode())] = tail
+
+    # Files with a "VIBRATIONAL FREQUENCIES" section and their "***imaginary mode***" counts
+    vibrational = set()
+    imaginary_counts = defaultdict(int)
+    for match in matches.splitlines():
+        count, _, match = match.lstrip().partition(b' ')
+        out_file_path, _, keyword = match.partition(b'\0')
+        out_file = os.path.basename(out_file_path.decode())
+        if keyword == b"VIBRATIONAL FREQUENCIES":
+            vibrational.add(out_file)
+        else:
+            imaginary_counts[out_file] += int(count)
+
+    return tails, vibrational, imaginary_counts, error_message